@@ -43,6 +43,7 @@ FETCH_DELAY_MS      = _getint("FETCH_DELAY_MS",       120 if FAST_MODE else 250)
 MAX_PAGES_PER_SITE  = _getint("MAX_PAGES_PER_SITE",   8   if FAST_MODE else 14)
 MIN_PAGES_BEFORE_FALLBACK = _getint("MIN_PAGES_BEFORE_FALLBACK", 3 if FAST_MODE else 8)
 SITE_BUDGET_SECONDS = _getint("SITE_BUDGET_SECONDS",  20  if FAST_MODE else 60)
+HTTP_CACHE_FILE     = _getstr("HTTP_CACHE_FILE", "")  # shelve path; enables ETag/Last-Modified revalidation
 
 HEADERS = {
     "User-Agent": USER_AGENT,
@@ -73,7 +74,14 @@ BAD_EXTENSIONS = [
 BAD_PATH_SNIPPETS = ["/wp-content/", "/static/", "/assets/", "/uploads/", "/media/"]
 
 # ===== Email / form extraction =====
-EMAIL_RE  = re.compile(r"[A-Z0-9._%+-]+@[A-Z0-9.-]+\.[A-Z]{2,24}", re.IGNORECASE)
+# google-re2 (optional) scans in guaranteed linear time with a DFA; plain `re` otherwise.
+# Inline (?i) so the same pattern string works with either engine.
+try:
+    import re2 as _email_engine  # type: ignore
+except ImportError:
+    _email_engine = re
+
+EMAIL_RE  = _email_engine.compile(r"(?i)\b[A-Z0-9._%+-]+@[A-Z0-9.-]+\.[A-Z]{2,24}\b")
 MAILTO_RE = re.compile(r'href=["\']mailto:([^"\']+)["\']', re.IGNORECASE)
 
 CONTACT_FORM_HINTS       = ["wpcf7", "wpforms", "hs-form", "hubspot", "formspree", "gravityforms", "contact-form"]
@@ -81,8 +89,20 @@ FORM_REQUIRE_FIELDS_ANY  = ["email"]
 FORM_REQUIRE_FIELDS_ALL  = ["message"]
 
 PREFER_COMPANY_DOMAIN = _getbool("PREFER_COMPANY_DOMAIN", True)
+TRUST_DOMAIN_HINT     = _getbool("TRUST_DOMAIN_HINT", True)    # a valid Domain cell skips site search
+# A "valid" Domain cell: "acme.co.uk", "www.acme.com/", "https://acme.com/about" -- not "Acme Ltd" or "n/a"
+DOMAIN_HINT_RE = re.compile(r"^(?:https?://)?(?:[a-z0-9-]+\.)+[a-z]{2,}(?::\d+)?(?:/\S*)?$", re.I | re.ASCII)
+
+def hint_url(domain_hint: str | None) -> str | None:
+    """https URL for a valid Domain cell ("@acme.co.uk" too), else None."""
+    dom = (domain_hint or "").strip().lstrip("@")
+    if not DOMAIN_HINT_RE.match(dom):
+        return None
+    return dom if dom.startswith("http") else f"https://{dom}"
+
 EMAIL_GUESS_ENABLE    = _getbool("EMAIL_GUESS_ENABLE", False)  # <— stay False so we don’t guess
 GENERIC_GUESS_PREFIXES = ["info"]  # kept for completeness
+GENERIC_LOCALS = ("info", "contact", "hello", "enquiries")  # shared inboxes rank first
 GUESS_GENERICS = GENERIC_GUESS_PREFIXES  # alias
 
 # ===== Search (Google CSE / Bing) =====
@@ -92,6 +112,8 @@ GOOGLE_CSE_QPS_DELAY_MS = _getint("GOOGLE_CSE_QPS_DELAY_MS", 600 if FAST_MODE el
 GOOGLE_CSE_MAX_RETRIES  = _getint("GOOGLE_CSE_MAX_RETRIES",  2   if FAST_MODE else 4)
 MAX_GOOGLE_CANDIDATES   = _getint("MAX_GOOGLE_CANDIDATES",   3   if FAST_MODE else 4)
 BING_API_KEY            = _getstr("BING_API_KEY", "")
+# Optional on-disk (shelve) cache of CSE results so re-runs skip the API for known queries
+CSE_CACHE_FILE          = _getstr("CSE_CACHE_FILE", "")
 
 # Downrank/noise hosts (added Amazon + Opentable + Ubuy etc.)
 BAD_HOSTS = [
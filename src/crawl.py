@@ -1,23 +1,33 @@
 # src/crawl.py
 from __future__ import annotations
-import logging, time, re
+import atexit, logging, shelve, threading, time, re
 from urllib.parse import urljoin, urlparse
-import requests
 from .config import (
-    HEADERS, HTTP_TIMEOUT, FETCH_DELAY_MS,
+    HTTP_TIMEOUT, FETCH_DELAY_MS, HTTP_CACHE_FILE,
     MAX_PAGES_PER_SITE, MIN_PAGES_BEFORE_FALLBACK, SITE_BUDGET_SECONDS,
     BAD_EXTENSIONS, BAD_PATH_SNIPPETS, CONTACT_PATHS,
     SCRAPERAPI_KEY, SCRAPERAPI_BASE, SCRAPERAPI_COUNTRY, SCRAPERAPI_RENDER,
 )
+from requests.compat import chardet
+from .http_utils import SESSION
 
-_session = requests.Session()
-_session.headers.update(HEADERS)
+# compiled / hoisted once instead of per link or per page
+_BAD_EXTENSIONS = tuple(BAD_EXTENSIONS)
+# every BAD_PATH_SNIPPETS needle in one automaton: a single pass per URL
+_BAD_PATH_RE = re.compile("|".join(map(re.escape, BAD_PATH_SNIPPETS)))
+_CONTACT_PATH_RE = re.compile("|".join(f"(?:{pat})" for pat in CONTACT_PATHS), re.IGNORECASE)
+_HREF_RE = re.compile(r'href=["\']([^"\']+)["\']', re.IGNORECASE)
+
+# Contact details live near the top of a page; cap each download at 512KB.
+# Servers that ignore Range still get truncated by the bounded read in fetch.
+_MAX_BYTES = 512 * 1024
+_RANGE_HEADERS = {"Range": f"bytes=0-{_MAX_BYTES - 1}"}
 
 def _ok(url: str) -> bool:
     ul = url.lower()
-    if any(ul.endswith(ext) for ext in BAD_EXTENSIONS):
+    if ul.endswith(_BAD_EXTENSIONS):
         return False
-    if any(sn in ul for sn in BAD_PATH_SNIPPETS):
+    if _BAD_PATH_RE.search(ul):
         return False
     return True
 
@@ -50,15 +60,90 @@ def _scraperapi(url: str) -> str:
         params["country_code"] = SCRAPERAPI_COUNTRY
     return f"{SCRAPERAPI_BASE.rstrip('/')}/?{urlencode(params)}"
 
-def fetch(url: str) -> str | None:
+# Per-host politeness: each request to a host reserves the next start slot
+# FETCH_DELAY_MS after the previous one. Different hosts never wait on each
+# other, and the lock is only held to book the slot, not while sleeping.
+_host_next: dict[str, float] = {}
+_host_lock = threading.Lock()
+
+def _polite_wait(url: str) -> None:
+    if FETCH_DELAY_MS <= 0:
+        return
+    host = urlparse(url).netloc.lower()
+    with _host_lock:
+        now = time.monotonic()
+        slot = max(now, _host_next.get(host, 0.0))
+        _host_next[host] = slot + FETCH_DELAY_MS / 1000.0
+    if slot > now:
+        time.sleep(slot - now)
+
+# Conditional-GET cache, opt-in via HTTP_CACHE_FILE: url -> validators, final
+# url and body. A page that hasn't changed since the last run comes back as a
+# bodyless 304. shelve isn't thread-safe, so every access holds the lock.
+_http_lock = threading.Lock()
+_http_shelf: shelve.Shelf | None = None
+
+def _http_cache_get(url: str) -> dict | None:
+    global _http_shelf
+    if not HTTP_CACHE_FILE:
+        return None
+    with _http_lock:
+        if _http_shelf is None:
+            _http_shelf = shelve.open(HTTP_CACHE_FILE)
+            atexit.register(_http_shelf.close)
+        return _http_shelf.get(url)
+
+def _http_cache_put(url: str, entry: dict) -> None:
+    with _http_lock:
+        if _http_shelf is not None:
+            _http_shelf[url] = entry
+
+def fetch_final(url: str) -> tuple[str, str | None]:
+    """Like fetch(), but also return the URL we ended up at after redirects."""
+    _polite_wait(url)
     try:
         target = _scraperapi(url)
-        r = _session.get(target, timeout=HTTP_TIMEOUT, allow_redirects=True)
-        r.raise_for_status()
-        return r.text
+        # not through ScraperAPI: it needn't pass validators through faithfully
+        cached = _http_cache_get(url) if target == url else None
+        headers = _RANGE_HEADERS
+        if cached:
+            headers = dict(_RANGE_HEADERS)
+            if cached.get("etag"):
+                headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"):
+                headers["If-Modified-Since"] = cached["last_modified"]
+        with SESSION.get(target, timeout=HTTP_TIMEOUT, allow_redirects=True,
+                         stream=True, headers=headers) as r:
+            if r.status_code == 304 and cached:
+                return cached["final"], cached["body"]
+            # Behind ScraperAPI r.url is the proxy endpoint, not the site.
+            final = url if target != url else r.url
+            if r.status_code >= 400:
+                logging.info("Skip %s: HTTP %s", url, r.status_code)
+                return final, None
+            # Content-Type is authoritative; don't download PDFs/images to sniff them.
+            ct = (r.headers.get("content-type") or "").lower()
+            if "html" not in ct and "xml" not in ct:
+                logging.info("Skip %s: content-type %r", url, ct)
+                return final, None
+            raw = r.raw.read(_MAX_BYTES, decode_content=True)
+            # r.apparent_encoding would read r.content (the rest of the stream),
+            # so detect on the bytes we already have instead.
+            enc = r.encoding or (chardet.detect(raw)["encoding"] if chardet else None) or "utf-8"
+            try:
+                text = raw.decode(enc, errors="replace")
+            except LookupError:  # bogus charset in Content-Type
+                text = raw.decode("utf-8", errors="replace")
+            etag, last_modified = r.headers.get("ETag"), r.headers.get("Last-Modified")
+            if target == url and HTTP_CACHE_FILE and (etag or last_modified):
+                _http_cache_put(url, {"etag": etag, "last_modified": last_modified, "final": final, "body": text})
+            return final, text
     except Exception as e:
         logging.info("Skip %s: %s", url, e)
-        return None
+        return url, None
+
+def fetch(url: str) -> str | None:
+    return fetch_final(url)[1]
 
 def crawl_candidate_pages(base_url: str, max_pages: int = 6) -> dict[str, str]:
     out: dict[str, str] = {}
@@ -74,7 +159,6 @@ def crawl_candidate_pages(base_url: str, max_pages: int = 6) -> dict[str, str]:
         tried += 1
         if html:
             out[url] = html
-        time.sleep(FETCH_DELAY_MS / 1000.0)
     return out
 
 def crawl_site(base_url: str) -> dict[str, str]:
@@ -108,7 +192,7 @@ def crawl_site(base_url: str) -> dict[str, str]:
 
         # lightweight link discovery
         try:
-            for href in re.findall(r'href=["\']([^"\']+)["\']', html, flags=re.IGNORECASE):
+            for href in _HREF_RE.findall(html):
                 u = _norm(url, href)
                 if not u or u in seen:
                     continue
@@ -118,11 +202,9 @@ def crawl_site(base_url: str) -> dict[str, str]:
         except Exception:
             pass
 
-        time.sleep(FETCH_DELAY_MS / 1000.0)
-
         # early exit if we already touched some pages and any looks contact-y
         if len(pages) >= MIN_PAGES_BEFORE_FALLBACK:
-            if any(re.search(pat, p, flags=re.IGNORECASE) for p in pages for pat in CONTACT_PATHS):
+            if any(_CONTACT_PATH_RE.search(p) for p in pages):
                 break
 
     logging.info("Crawled %d pages on %s", len(pages), base_url)
@@ -1,13 +1,21 @@
 # src/extract.py
 from __future__ import annotations
 
+import functools
+import json
 import re
-from html import unescape
+from io import BytesIO
 from typing import Dict, Set, Any
-from urllib.parse import urlparse
+from urllib.parse import unquote, urlparse
 
 import tldextract
-from bs4 import BeautifulSoup
+from lxml import etree
+
+# orjson (optional, C) for JSON-LD blobs; stdlib json otherwise
+try:
+    from orjson import loads as _json_loads  # type: ignore
+except ImportError:
+    _json_loads = json.loads
 
 # ---- Safe imports from config with sensible fallbacks ----
 # Email regexes
@@ -16,17 +24,16 @@ try:
 except Exception:
     EMAIL_RE = re.compile(r"[A-Z0-9._%+-]+@[A-Z0-9.-]+\.[A-Z]{2,}", re.I)
 
-try:
-    from .config import MAILTO_RE  # compiled regex for mailto:
-except Exception:
-    MAILTO_RE = re.compile(r"mailto:([^\s\"'>?#]+)", re.I)
-
 # Prefer company-domain emails?
 try:
     from .config import PREFER_COMPANY_DOMAIN  # bool
 except Exception:
     PREFER_COMPANY_DOMAIN = True
 
+# Shared inboxes (info@, contact@, ...) rank ahead of personal addresses; one
+# list for this module and main
+from .config import GENERIC_LOCALS
+
 # Hints that a <form> is a contact form
 try:
     from .config import CONTACT_FORM_HINTS  # iterable[str]
@@ -38,81 +45,244 @@ except Exception:
 
 
 # ---- Helpers ----
-def _registrable_domain(url_or_host: str) -> str:
-    """Return eTLD+1 from a URL or host (e.g., www.foo.co.uk -> foo.co.uk)."""
+# Offline extractor: the bundled Public Suffix List snapshot, never a network
+# fetch of the live list. Warmed here so the first page doesn't pay the load.
+_TLDX = tldextract.TLDExtract(suffix_list_urls=(), include_psl_private_domains=False)
+_TLDX("example.com")
+
+# pydomainextractor (optional, Rust) does the same PSL split far faster; it
+# rejects IPs and malformed hosts, which then go through tldextract.
+try:
+    import pydomainextractor  # type: ignore
+    _PDE = pydomainextractor.DomainExtractor()
+except ImportError:
+    _PDE = None
+
+
+@functools.lru_cache(maxsize=8192)
+def _registrable_domain_host(host: str, private: bool = False) -> str:
+    """
+    eTLD+1 for a bare host. Memoized: the same few hosts recur across pages/emails.
+    private=True also treats the PSL's private suffixes (myshopify.com, wixsite.com)
+    as suffixes, so each site on a shared platform is its own registrable domain.
+    """
+    host = host.lower()
+    if _PDE is not None and not private:
+        try:
+            d = _PDE.extract(host)
+            if d["domain"] and d["suffix"]:
+                return f"{d['domain']}.{d['suffix']}"
+        except Exception:
+            pass
+    ext = _TLDX(host, include_psl_private_domains=private)
+    if not ext.domain:
+        return host
+    return f"{ext.domain}.{ext.suffix}" if ext.suffix else ext.domain
+
+
+def _registrable_domain(url_or_host: str, hint: str | None = None) -> str:
+    """Return eTLD+1 from a URL or host (e.g., www.foo.co.uk -> foo.co.uk).
+
+    ``hint`` is a bare company domain (the sheet's Domain column). If the hint is
+    itself a registrable domain (resolved once; memoized) and the host is that
+    domain or one of its subdomains, the hint is the answer without a lookup
+    for the host. "shop.acme.co.uk" or "acme.com/uk" don't qualify.
+    """
     if not url_or_host:
         return ""
-    host = url_or_host
-    if "://" in url_or_host:
-        host = urlparse(url_or_host).netloc
-    ext = tldextract.extract(host)
-    if not ext.domain:
-        return host.lower()
-    return f"{ext.domain}.{ext.suffix}".lower() if ext.suffix else ext.domain.lower()
+    host = (urlparse(url_or_host).netloc if "://" in url_or_host else url_or_host).lower()
+    if hint:
+        hint = hint.strip().lstrip("@").lower().removeprefix("www.")
+        if (
+            hint
+            and (host == hint or host.endswith("." + hint))
+            and _registrable_domain_host(hint) == hint
+        ):
+            return hint
+    return _registrable_domain_host(host)
+
+
+# Case-insensitive matchers, so callers never allocate lowercased copies
+_CONTACT_URL_RE = re.compile(
+    r"contact|get-in-touch|enquire|inquiry|kontakt|impressum"
+    r"|/(?:support|help)(?:/|$)",  # common “/support”, “/help” pages
+    re.I,
+)
+_CONTACT_TITLE_RE = re.compile(r"contact|get in touch|support|help|impressum|kontakt", re.I)
+# All CONTACT_FORM_HINTS fused into one alternation: one scan per attribute
+_FORM_HINT_RE = re.compile("|".join(map(re.escape, sorted(CONTACT_FORM_HINTS))), re.I)
+_EMAIL_FIELD_RE = re.compile(r"e-?mail", re.I)
+_MESSAGE_FIELD_RE = re.compile(r"message|enquiry|inquiry|subject", re.I)
 
 
 def _looks_like_contact_url(url: str) -> bool:
-    u = (url or "").lower()
-    if any(k in u for k in ["contact", "get-in-touch", "enquire", "inquiry", "kontakt", "impressum"]):
-        return True
-    # common “/support”, “/help” pages
-    if re.search(r"/(support|help)(/|$)", u):
-        return True
-    return False
+    return bool(url) and _CONTACT_URL_RE.search(url) is not None
+
 
+def _looks_like_contact_title(title: str) -> bool:
+    return bool(title) and _CONTACT_TITLE_RE.search(title) is not None
+
+
+# Elements whose text is never rendered, so it is not "visible text"
+_NON_VISIBLE_TAGS = {"script", "style", "noscript", "template"}
+
+# Stop collecting visible text past this many characters (contact details
+# live near the top or in the footer; multi-MB pages are mostly noise)
+_MAX_TEXT_CHARS = 600_000
+
+
+def _scan(html: str | bytes) -> Dict[str, Any]:
+    """
+    Walk the document once with lxml's iterparse and fan each element out to
+    every extractor we need (mailto links, forms, JSON-LD, title, visible text).
+    Elements are cleared as soon as they close, so memory stays ~O(depth).
+
+    Raw bytes are handed to lxml as-is (it sniffs the charset itself); text is
+    collected the same way for both, so bytes and str give the same answer.
+    """
+    out: Dict[str, Any] = {"mailtos": [], "forms": [], "jsonld": [], "title": "", "text": ""}
+    chunks: list[str] = []
+    text_len = 0
+    form: Dict[str, Any] | None = None
+    label_start: int | None = None
+
+    if isinstance(html, bytes):
+        data, encoding = html, None
+    else:
+        data, encoding = html.encode("utf-8", "replace"), "utf-8"
 
-def _looks_like_contact_title(soup: BeautifulSoup) -> bool:
     try:
-        title = (soup.title.string or "").strip().lower()
-    except Exception:
-        title = ""
-    return any(k in title for k in ["contact", "get in touch", "support", "help", "impressum", "kontakt"])
+        events = etree.iterparse(
+            BytesIO(data),
+            events=("start", "end"),
+            html=True,
+            encoding=encoding,
+        )
+        for event, el in events:
+            tag = el.tag.lower() if isinstance(el.tag, str) else ""
+
+            if event == "start":
+                if tag == "a":
+                    href = el.get("href") or ""
+                    if href[:7].lower() == "mailto:":
+                        out["mailtos"].append(href[7:])
+                elif tag == "form":
+                    form = {
+                        "action": el.get("action") or "",
+                        "id": el.get("id") or "",
+                        "class": el.get("class") or "",
+                        "fields": [],
+                        "labels": [],
+                    }
+                elif form is not None:
+                    if tag in ("input", "textarea", "select"):
+                        form["fields"].append(f"{el.get('name') or ''} {el.get('placeholder') or ''}")
+                    elif tag == "label":
+                        label_start = len(chunks)
+                continue
+
+            # "end": text and children's tails are complete now
+            if tag == "script":
+                if "ld+json" in (el.get("type") or "").lower():
+                    out["jsonld"].append(el.text or "")
+            elif tag == "title":
+                if not out["title"]:
+                    out["title"] = el.text or ""
+            if text_len < _MAX_TEXT_CHARS:
+                if tag not in _NON_VISIBLE_TAGS and el.text:
+                    chunks.append(el.text)
+                    text_len += len(el.text)
+                for child in el:
+                    if child.tail:
+                        chunks.append(child.tail)
+                        text_len += len(child.tail)
+
+            if form is not None:
+                if tag == "label" and label_start is not None:
+                    form["labels"].append(" ".join(chunks[label_start:]))
+                    label_start = None
+                elif tag == "form":
+                    out["forms"].append(form)
+                    form = None
+
+            el.clear(keep_tail=True)
+    except etree.LxmlError:
+        # empty / hopelessly broken documents: keep whatever we saw
+        pass
+
+    if form is not None:  # unclosed <form> at EOF
+        out["forms"].append(form)
+    out["text"] = " ".join(chunks)
+    return out
 
 
-def _extract_emails_from_html(html: str) -> Set[str]:
+def _jsonld_emails(blobs: list[str]) -> Set[str]:
+    out: Set[str] = set()
+
+    def walk(node: Any) -> None:
+        if isinstance(node, dict):
+            for k, v in node.items():
+                if k == "email" and isinstance(v, str):
+                    out.add(v.split(":", 1)[1] if v.lower().startswith("mailto:") else v)
+                else:
+                    walk(v)
+        elif isinstance(node, list):
+            for v in node:
+                walk(v)
+
+    for blob in blobs:
+        try:
+            walk(_json_loads(blob))
+        except Exception:
+            continue
+    return {e.strip() for e in out if "@" in e}
+
+
+def _extract_emails_from_scan(scan: Dict[str, Any]) -> Set[str]:
     out: Set[str] = set()
-    if not isinstance(html, str):
-        return out
 
     # mailto: links
-    for m in MAILTO_RE.findall(html or ""):
-        e = unescape(m).split("?")[0].strip()
+    for m in scan["mailtos"]:
+        e = unquote(m).split("?")[0].strip()
         if e:
             out.add(e)
 
-    # visible text
-    try:
-        text = BeautifulSoup(html, "html.parser").get_text(" ", strip=True)
-    except Exception:
-        text = ""
-    for m in EMAIL_RE.findall(text):
+    # visible text (never attributes or script bodies, whatever the input type)
+    for m in EMAIL_RE.findall(scan["text"]):
         out.add(m.strip())
 
+    # schema.org JSON-LD ("email" / contactPoint.email)
+    out.update(_jsonld_emails(scan["jsonld"]))
+
     return out
 
 
-def _has_contact_form(soup: BeautifulSoup) -> bool:
-    forms = soup.find_all("form")
+def _has_contact_form(forms: list[Dict[str, Any]]) -> bool:
     for f in forms:
-        classes = " ".join((f.get("class") or [])) if f.has_attr("class") else ""
-        elem_id = f.get("id") or ""
-        blob = f"{classes} {elem_id}".lower()
-        if any(h in blob for h in CONTACT_FORM_HINTS):
+        if _FORM_HINT_RE.search(f["class"]) or _FORM_HINT_RE.search(f["id"]):
             return True
 
         # field-based heuristic
-        inputs = f.find_all(["input", "textarea", "select"])
-        names = " ".join((i.get("name") or "") for i in inputs).lower()
-        placeholders = " ".join((i.get("placeholder") or "") for i in inputs).lower()
-        labels = " ".join(l.get_text(" ", strip=True).lower() for l in f.find_all("label"))
-        field_blob = f"{names} {placeholders} {labels}"
-        if any(k in field_blob for k in ["email", "e-mail"]) and any(
-            k in field_blob for k in ["message", "enquiry", "inquiry", "subject"]
+        texts = f["fields"] + f["labels"]
+        if any(_EMAIL_FIELD_RE.search(t) for t in texts) and any(
+            _MESSAGE_FIELD_RE.search(t) for t in texts
         ):
             return True
     return False
 
 
+def _extract_one(url: str, html: str | bytes) -> tuple[Set[str], bool]:
+    """Per-page work: (emails found, page looks like a contact page/form)."""
+    scan = _scan(html)
+    is_contact = (
+        _looks_like_contact_url(url)
+        or _looks_like_contact_title(scan["title"])
+        or _has_contact_form(scan["forms"])
+    )
+    return _extract_emails_from_scan(scan), is_contact
+
+
+
 # ---- Public API (backwards-compatible signature) ----
 def extract_contacts(
     pages: Dict[str, Any],
@@ -143,28 +313,28 @@ def extract_contacts(
         else:
             base_url = ""
 
-    reg_base = _registrable_domain(preferred_domain or base_url)
+    reg_base = _registrable_domain(preferred_domain or base_url, hint=preferred_domain)
 
     emails_all: Set[str] = set()
     email_sources: Dict[str, str] = {}
     forms: Set[str] = set()
 
-    for url, html in (pages or {}).items():
-        # Some callers accidentally pass tuples or None; ignore non-strings safely
-        if not isinstance(html, str):
-            continue
-
-        soup = BeautifulSoup(html, "html.parser")
+    # Some callers accidentally pass tuples or None; ignore those safely.
+    # Raw response bytes are fine (and skip a decode), as is decoded text.
+    items = [(url, html) for url, html in (pages or {}).items() if isinstance(html, (str, bytes))]
 
+    # Parsed inline: callers already run extraction on worker threads, and a
+    # process pool costs more in fork/pickle than a handful of pages take
+    for url, html in items:
+        found, is_contact = _extract_one(url, html)
         # 1) Emails
-        found = _extract_emails_from_html(html)
         for e in found:
             if e not in email_sources:
                 email_sources[e] = url
         emails_all.update(found)
 
         # 2) Contact forms / pages
-        if _looks_like_contact_url(url) or _looks_like_contact_title(soup) or _has_contact_form(soup):
+        if is_contact:
             forms.add(url)
 
     # Prefer company-domain emails when configured
@@ -176,14 +346,20 @@ def extract_contacts(
         reg = _registrable_domain(host)
         return bool(reg_base) and reg.endswith(reg_base)
 
-    prioritized = [e for e in emails_all if (not PREFER_COMPANY_DOMAIN) or _is_company_email(e)]
-    fallback = [e for e in emails_all if e not in prioritized]
+    # Deterministic ranking (same input -> same pick on every run): company domain,
+    # then role mailboxes people actually answer, then the shorter address.
+    def _rank(e: str) -> tuple:
+        local = e.split("@", 1)[0].lower()
+        return (0 if _is_company_email(e) else 1, 0 if local in GENERIC_LOCALS else 1, len(e), e)
+
+    prioritized = sorted((e for e in emails_all if (not PREFER_COMPANY_DOMAIN) or _is_company_email(e)), key=_rank)
+    fallback = sorted(emails_all.difference(prioritized), key=_rank)
 
     best_email = prioritized[0] if prioritized else (fallback[0] if fallback else "")
-    best_form = next(iter(forms), "")
+    best_form = next((url for url, _ in items if url in forms), "")  # first in crawl order
 
     return {
-        "emails": sorted(prioritized) + sorted(fallback),
+        "emails": prioritized + fallback,
         "email_sources": email_sources,
         "forms": sorted(forms),
         "best_email": best_email,
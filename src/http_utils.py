@@ -0,0 +1,33 @@
+# src/http_utils.py
+from __future__ import annotations
+
+import atexit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .config import GOOGLE_CSE_MAX_RETRIES, HEADERS
+
+# One pooled, keep-alive session shared by every outbound call (page fetches,
+# Google CSE, ...), so repeat requests to a host skip the TCP + TLS handshake.
+SESSION = requests.Session()
+SESSION.headers.update(HEADERS)
+atexit.register(SESSION.close)
+
+_adapter = HTTPAdapter(pool_connections=32, pool_maxsize=64, max_retries=Retry(total=0))
+SESSION.mount("http://", _adapter)
+SESSION.mount("https://", _adapter)
+
+# Google APIs (CSE) get GOOGLE_CSE_MAX_RETRIES transient-error retries with
+# backoff; page fetches above stay at zero retries so one dead site can't stall
+# a row. requests picks the longest matching mount prefix. raise_on_status=False
+# hands the final 429/5xx back to the caller instead of raising.
+_api_retry = Retry(
+    total=GOOGLE_CSE_MAX_RETRIES,
+    backoff_factor=0.5,
+    status_forcelist=(429, 500, 502, 503, 504),
+    allowed_methods=frozenset({"GET"}),
+    raise_on_status=False,
+)
+SESSION.mount("https://www.googleapis.com/", HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=_api_retry))
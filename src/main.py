@@ -2,19 +2,30 @@
 from __future__ import annotations
 
 import base64
+import functools
+import html as htmllib
 import json
 import logging
 import os
 import re
+import socket
 import sys
+import threading
 import time
-from datetime import datetime
-from typing import Dict, List, Optional, Tuple
+from collections import deque, namedtuple
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FuturesTimeout, as_completed
+from itertools import islice
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, List, Optional, Tuple
 from urllib.parse import urlparse, urljoin
 
 import gspread
 import requests
-from bs4 import BeautifulSoup
+
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup
+
+from .config import GENERIC_LOCALS, PREFER_COMPANY_DOMAIN, TRUST_DOMAIN_HINT, hint_url
+from .sheet import first_unprocessed_row, iter_rows, needs_processing, now_iso
 
 # Optional project modules (feature-detected)
 try:
@@ -32,6 +43,12 @@ try:
 except Exception:
     extract_mod = None  # type: ignore
 
+try:
+    from .http_utils import SESSION
+except Exception:
+    SESSION = requests.Session()
+    SESSION.headers["User-Agent"] = "Mozilla/5.0"
+
 logging.basicConfig(level=logging.INFO, format="%(levelname)s:%(name)s:%(message)s")
 LOG = logging.getLogger("main")
 
@@ -44,26 +61,59 @@ DEFAULT_CONTACT_SLUGS = [
     "getintouch",
 ]
 ANCHOR_KEYWORDS = ["contact", "get in touch", "enquire", "enquiry", "enquiries", "support", "help"]
-EMAIL_RE = re.compile(r"[A-Z0-9._%+-]+@[A-Z0-9.-]+\.[A-Z]{2,}", re.I)
+NON_HTTP_HREFS = ("mailto:", "tel:", "javascript:", "#")
+ANCHOR_RE = re.compile("|".join(map(re.escape, ANCHOR_KEYWORDS)), re.I | re.ASCII)
+CONTACT_HREF_RE = re.compile("contact", re.I | re.ASCII)
+# authority of an http(s) URL, the shape nearly every URL here has
+HOST_RE = re.compile(r"^https?://([^/?#]+)", re.I | re.ASCII)
+FORM_RE = re.compile(r"<form\b", re.I | re.ASCII)
+# "@" as written or entity-encoded (&#64; &#x40; &commat;), as obfuscated pages do
+AT_SIGN_RE = re.compile(r"@|&#0*64;|&#x0*40;|&commat;", re.I | re.ASCII)
+# What the scan sees of a page: script/style bodies and tags drop out, an <a>
+# tag leaves only its href behind (group 2). Visible text stays as is.
+MARKUP_RE = re.compile(
+    r"<(script|style)\b.*?</\1\s*>"
+    r"|<a\b[^>]*?\bhref\s*=\s*[\"']?([^\"'\s>]*)[^>]*>"
+    r"|<[^>]*>",
+    re.I | re.S | re.ASCII,
+)
+# group 1: mailto target, group 2: bare address
+COMBO_RE = re.compile(r"mailto:([^\s\"'>?#]+)|([A-Z0-9._%+-]+@[A-Z0-9.-]+\.[A-Z]{2,})", re.I | re.ASCII)
+MAX_FETCH_BYTES = 1_048_576
+MAX_SCAN = 2_000_000
+MAX_EMAILS = 50
+ASSET_SUFFIXES = (".png", ".jpg", ".jpeg", ".gif", ".svg", ".webp", ".css", ".js")
+FETCH_WORKERS = max(1, int(os.getenv("FETCH_WORKERS", "8") or "8"))
+ROW_WORKERS = max(1, int(os.getenv("ROW_WORKERS", "4") or "4"))
+SEARCH_ROW_WORKERS = max(1, int(os.getenv("SEARCH_ROW_WORKERS", "2") or "2"))
+# One long-lived pool for page fetches and CSE calls across all rows, so threads
+# are started once per run rather than per row. Each fetch_pages() call still
+# keeps at most FETCH_WORKERS of its own requests in flight.
+IO_POOL = ThreadPoolExecutor(max_workers=FETCH_WORKERS * (ROW_WORKERS + SEARCH_ROW_WORKERS), thread_name_prefix="io")
+ROW_PAGE = int(os.getenv("ROW_PAGE", "500") or "500")  # rows per sheet read
+FLUSH_EVERY_ROWS = max(1, int(os.getenv("FLUSH_EVERY_ROWS", "10") or "10"))
+ROW_FETCH_BUDGET_S = float(os.getenv("ROW_FETCH_BUDGET_S", "45") or "45")
 
 BAD_HOSTS = {
     "facebook.com","m.facebook.com","instagram.com","twitter.com","x.com","linkedin.com","youtube.com",
     "wikipedia.org","reddit.com","medium.com","blogspot.com","wordpress.com","typepad.com",
     "pinterest.com","yelp.com","foursquare.com","amazon.com","amazon.co.uk","aws.amazon.com",
 }
+BAD_EXACT = frozenset(BAD_HOSTS)
+# subdomains of a bad host (www.facebook.com, uk.linkedin.com) plus generic
+# .gov mega-portals, checked with a single C-level endswith over the tuple
+BAD_SUFFIXES = tuple("." + h for h in BAD_HOSTS) + (".gov", ".gov.uk")
+
 def is_bad_host(host: str) -> bool:
     h = (host or "").lower()
     if not h:
         return True
-    if h in BAD_HOSTS:
-        return True
-    # de-prioritize generic .gov mega-portals
-    if h.endswith(".gov") or h.endswith(".gov.uk"):
-        return True
-    return False
+    return h in BAD_EXACT or h.endswith(BAD_SUFFIXES)
 
 # ===== Secrets / auth helpers
+@functools.lru_cache(maxsize=4)
 def b64_to_json(s: str) -> dict:
+    # cached on the raw env value; callers must treat the dict as read-only
     s = (s or "").strip()
     if not s:
         raise RuntimeError("GOOGLE_SA_JSON_B64 is empty")
@@ -71,7 +121,7 @@ def b64_to_json(s: str) -> dict:
         return json.loads(s)
     if "base64" in s[:60] and "," in s:
         s = s.split(",", 1)[1]
-    s = re.sub(r"\s+", "", s)
+    s = "".join(s.split())
     try:
         pad = (-len(s)) % 4
         if pad:
@@ -82,105 +132,187 @@ def b64_to_json(s: str) -> dict:
         data = base64.urlsafe_b64decode(s + "=" * ((4 - len(s) % 4) % 4))
         return json.loads(data.decode("utf-8"))
 
+@functools.lru_cache(maxsize=4)
 def open_sheet(sheet_id: str, sheet_tab: str) -> gspread.Worksheet:
+    # auth + spreadsheet metadata fetch happen once per (sheet, tab)
     creds = b64_to_json(os.getenv("GOOGLE_SA_JSON_B64", ""))
     gc = gspread.service_account_from_dict(creds)
     return gc.open_by_key(sheet_id).worksheet(sheet_tab)
 
-def header_map(ws: gspread.Worksheet) -> Dict[str, int]:
-    return {h.strip(): i + 1 for i, h in enumerate(ws.row_values(1)) if h.strip()}
+def header_map(header_row: List[str]) -> Dict[str, int]:
+    return {h.strip(): i + 1 for i, h in enumerate(header_row) if h.strip()}
 
-def now_iso() -> str:
-    return datetime.utcnow().isoformat(timespec="seconds") + "Z"
+# 1-based column numbers (None if the header is missing), resolved once per run
+Cols = namedtuple("Cols", "company domain website email form source status checked")
+COL_HEADERS = ("Company", "Domain", "Website", "ContactEmail", "ContactFormURL", "SourceURL", "Status", "LastChecked")
+
+def resolve_cols(H: Dict[str, int]) -> Cols:
+    return Cols(*(H.get(name) for name in COL_HEADERS))
 
 # ===== Fetch / parse
-def safe_fetch(url: str, timeout: int = 15) -> Optional[str]:
+def install_dns_cache(maxsize: int = 1024, ttl_s: float = 300.0) -> None:
+    """
+    Memoize socket.getaddrinfo for ttl_s seconds. Every candidate page for a
+    company shares a host, and the pool re-resolves whenever it opens a new
+    connection; the TTL keeps a long run from pinning stale addresses.
+    Failed lookups raise and so are never cached.
+    """
+    if getattr(socket.getaddrinfo, "_dns_cached", False):
+        return
+    resolve = socket.getaddrinfo
+    cache: Dict[tuple, Tuple[float, tuple]] = {}
+    lock = threading.Lock()
+
+    def getaddrinfo(*args, **kwargs):
+        key = args + tuple(sorted(kwargs.items()))
+        now = time.monotonic()
+        with lock:
+            hit = cache.get(key)
+        if hit and hit[0] > now:
+            return list(hit[1])
+        res = tuple(resolve(*args, **kwargs))
+        with lock:
+            cache.pop(key, None)
+            cache[key] = (now + ttl_s, res)
+            if len(cache) > maxsize:
+                del cache[next(iter(cache))]  # oldest entry
+        return list(res)
+
+    getaddrinfo._dns_cached = True  # type: ignore[attr-defined]
+    socket.getaddrinfo = getaddrinfo
+
+def safe_fetch_final(url: str, timeout: int = 15) -> Tuple[str, Optional[str]]:
+    """
+    Stream url and return (final url, html). Non-HTML responses and bodies
+    advertised as larger than MAX_FETCH_BYTES are dropped before the body is
+    downloaded; anything else is read up to MAX_FETCH_BYTES.
+    """
     try:
-        r = requests.get(url, timeout=timeout, headers={"User-Agent": "Mozilla/5.0"})
-        if 200 <= r.status_code < 300:
-            return r.text
+        with SESSION.get(url, timeout=timeout, stream=True) as r:
+            if not 200 <= r.status_code < 300:
+                return r.url, None
+            if "html" not in (r.headers.get("Content-Type") or "").lower():
+                return r.url, None
+            if int(r.headers.get("Content-Length") or 0) > MAX_FETCH_BYTES:
+                return r.url, None
+            raw = r.raw.read(MAX_FETCH_BYTES, decode_content=True)
+            try:
+                return r.url, raw.decode(r.encoding or "utf-8", "replace")
+            except LookupError:  # bogus charset in Content-Type
+                return r.url, raw.decode("utf-8", "replace")
     except Exception:
         pass
-    return None
+    return url, None
 
-def extract_contacts_from_html(html: str, page_url: str) -> Tuple[List[str], bool]:
-    # Prefer project extractor if present
-    if extract_mod:
-        try:
-            info = extract_mod.extract_contacts(html, base_url=page_url)  # type: ignore
-            emails = sorted(set(info.get("emails", []) or []))
-            has_form = bool(info.get("has_form") or info.get("forms"))
-            return emails, has_form
-        except TypeError:
-            try:
-                info = extract_mod.extract_contacts(html)  # type: ignore
-                emails = sorted(set(info.get("emails", []) or []))
-                has_form = bool(info.get("has_form") or info.get("forms"))
-                return emails, has_form
-            except Exception:
-                pass
-        except Exception:
-            pass
+def safe_fetch(url: str, timeout: int = 15) -> Optional[str]:
+    return safe_fetch_final(url, timeout)[1]
 
-    soup = BeautifulSoup(html or "", "html.parser")
+def parse_html(html: str) -> "BeautifulSoup":
+    # lxml is a C parser, ~10x faster than html.parser. Link discovery is the
+    # only caller and parses each homepage once, so nothing is cached. It only
+    # reads <a> from the returned tree, so the strainer skips every other node.
+    # bs4 is imported here, not at module level: only homepage link discovery
+    # needs a tree, so short runs that never get that far skip the import.
+    from bs4 import BeautifulSoup, SoupStrainer
+
+    return BeautifulSoup(html, "lxml", parse_only=SoupStrainer("a"))
+
+def extract_contacts_from_html(html: str, page_url: str) -> Tuple[List[str], bool]:
+    # Both checks are plain regex passes over the raw HTML; no soup is built.
+    html = html or ""
+    has_form = FORM_RE.search(html) is not None
+    # No "@" anywhere, literal or entity-encoded, means no address (mailto or
+    # text) can be on the page.
+    if not AT_SIGN_RE.search(html):
+        return [], has_form
+
+    # mailto: targets and bare addresses in a single regex pass over the page's
+    # text and link targets, entity-decoded (info&#64;acme.co.uk counts) and
+    # without attribute values or script bodies (no logo@2x.png "emails").
+    # The scan is capped at MAX_SCAN chars and MAX_EMAILS hits: contact details
+    # sit well inside that, and it bounds the cost of huge or junk-filled pages.
+    text = htmllib.unescape(MARKUP_RE.sub(lambda m: f" {m.group(2)} " if m.group(2) else " ", html[:MAX_SCAN]))
     emails = set()
-    for a in soup.find_all("a", href=True):
-        href = a["href"] or ""
-        if href.lower().startswith("mailto:"):
-            addr = href.split(":", 1)[1].split("?", 1)[0].strip()
-            if addr:
-                emails.add(addr)
-    emails.update(EMAIL_RE.findall(soup.get_text(" ")))
+    for m in COMBO_RE.finditer(text):
+        addr = (m.group(1) or m.group(2)).strip()
+        if addr and not addr.lower().endswith(ASSET_SUFFIXES):  # e.g. logo@2x.png
+            emails.add(addr)
+            if len(emails) >= MAX_EMAILS:
+                break
     emails = {e for e in emails if "@" in e and not e.lower().startswith("noreply")}
-    has_form = bool(soup.find("form"))
     return sorted(emails), has_form
 
 def collect_contactish_links(base_url: str, html: str, limit: int = 20) -> List[str]:
     out: List[str] = []
     if not html:
         return out
-    soup = BeautifulSoup(html, "html.parser")
-    base_host = urlparse(base_url).netloc.lower()
+    soup = parse_html(html)
+    base = urlparse(base_url)
+    base_host = base.netloc.lower()
+    origin = f"{base.scheme}://{base.netloc}"
     seen = set()
     for a in soup.find_all("a", href=True):
-        txt = (a.get_text(" ") or "").strip().lower()
-        href = a["href"]
-        if any(k in txt for k in ANCHOR_KEYWORDS) or "contact" in href.lower():
-            u = urljoin(base_url, href)
-            p = urlparse(u)
-            if p.scheme in ("http", "https") and p.netloc.lower().endswith(base_host):
-                if u not in seen:
-                    seen.add(u)
-                    out.append(u)
+        href = a["href"].strip()
+        if href.startswith(NON_HTTP_HREFS):
+            continue
+        if CONTACT_HREF_RE.search(href) or ANCHOR_RE.search(a.get_text(" ") or ""):
+            if href.startswith("/") and not href.startswith("//"):
+                # root-relative: same host by construction, no parse needed
+                u = origin + href
+            else:
+                u = urljoin(base_url, href)
+                p = urlparse(u)
+                if p.scheme not in ("http", "https") or not p.netloc.lower().endswith(base_host):
+                    continue
+            if u not in seen:
+                seen.add(u)
+                out.append(u)
         if len(out) >= limit:
             break
     return out
 
-def discover_contact_pages(base_url: str) -> List[str]:
-    base = base_url.rstrip("/")
+def url_host(url: str) -> str:
+    """Lowercased netloc; a regex match for http(s) URLs, urlparse for anything else."""
+    m = HOST_RE.match(url)
+    return (m.group(1) if m else urlparse(url).netloc).lower()
+
+def norm_url(u: str) -> str:
+    # "https://x.com/contact/", ".../contact#form" and ".../contact" are one page.
+    return urlparse(u)._replace(fragment="").geturl().rstrip("/")
+
+def discover_contact_pages(base_url: str) -> Tuple[Optional[str], List[str]]:
+    """
+    Return (homepage html, candidate urls). The homepage is always the first
+    candidate; its html is handed back so the caller doesn't fetch it twice.
+    """
+    # Resolve redirects (bare -> www, http -> https) once up front so the slug
+    # candidates and homepage below all point at the canonical host.
+    final_url, homepage_html = fetch_page_final(base_url.rstrip("/"))
     candidates: List[str] = []
 
-    # start with the homepage
-    candidates.append(base)
+    # start with the homepage, wherever it redirected to
+    candidates.append(norm_url(final_url))
 
-    # try clean slugs (with and without trailing slash)
+    # try clean slugs off the site root: a redirect to /index.php?lang=en must
+    # not end up as .../index.php?lang=en/contact (a trailing-slash variant
+    # would be deduped away below)
+    p = urlparse(final_url)
+    origin = f"{p.scheme}://{p.netloc}"
     for slug in DEFAULT_CONTACT_SLUGS:
-        u1 = f"{base}/{slug}"
-        u2 = f"{u1}/"
-        candidates.extend([u1, u2])
+        candidates.append(f"{origin}/{slug}")
 
     # include anchor-discovered links from the homepage
-    homepage_html = fetch_page(base)
-    candidates.extend(collect_contactish_links(base, homepage_html))
+    candidates.extend(collect_contactish_links(final_url, homepage_html or ""))
 
-    # dedupe, keep order
+    # dedupe on the normalized form, keep order
     seen = set()
     ordered = []
     for u in candidates:
-        if u not in seen:
-            seen.add(u)
+        key = norm_url(u)
+        if key not in seen:
+            seen.add(key)
             ordered.append(u)
-    return ordered[:40]
+    return homepage_html, ordered[:40]
 
 def fetch_page(url: str) -> Optional[str]:
     # Use project fetcher if present
@@ -194,12 +326,186 @@ def fetch_page(url: str) -> Optional[str]:
             pass
     return safe_fetch(url)
 
+# host -> {path?query: expiry (epoch seconds)} for URLs that came back empty
+# (HTTP error, non-HTML, timeout), so other rows on the same host don't probe
+# them again. An empty result can be transient (a timeout, a 429), so entries
+# expire after NEG_CACHE_TTL_S. Persisted between runs only if NEG_CACHE_FILE
+# is set. Written from IO_POOL workers, hence the lock.
+NEG_CACHE: Dict[str, Dict[str, float]] = {}
+NEG_CACHE_FILE = os.getenv("NEG_CACHE_FILE", "").strip()
+NEG_CACHE_TTL_S = float(os.getenv("NEG_CACHE_TTL_S", "86400") or "86400")
+_neg_lock = threading.Lock()
+
+def _host_path(url: str) -> Tuple[str, str]:
+    p = urlparse(url)
+    path = p.path.rstrip("/") or "/"
+    return p.netloc.lower(), f"{path}?{p.query}" if p.query else path
+
+def is_dead(url: str) -> bool:
+    host, path = _host_path(url)
+    with _neg_lock:
+        expires = NEG_CACHE.get(host, {}).get(path)
+    return expires is not None and expires > time.time()
+
+def fetch_page_noting_dead(url: str) -> Optional[str]:
+    html = fetch_page(url)
+    if html is None:
+        host, path = _host_path(url)
+        with _neg_lock:
+            NEG_CACHE.setdefault(host, {})[path] = time.time() + NEG_CACHE_TTL_S
+    return html
+
+def load_neg_cache() -> None:
+    if not NEG_CACHE_FILE or not os.path.exists(NEG_CACHE_FILE):
+        return
+    now = time.time()
+    try:
+        with open(NEG_CACHE_FILE, encoding="utf-8") as f:
+            data = json.load(f)
+        with _neg_lock:
+            for host, paths in data.items():
+                if not isinstance(paths, dict):
+                    continue  # older format without expiry times: let it lapse
+                live = {p: float(t) for p, t in paths.items() if float(t) > now}
+                if live:
+                    NEG_CACHE.setdefault(host, {}).update(live)
+    except Exception as e:
+        LOG.warning(f"Ignoring unreadable {NEG_CACHE_FILE}: {e}")
+
+def save_neg_cache() -> None:
+    if not NEG_CACHE_FILE:
+        return
+    # Snapshot first (abandoned fetches may still be adding entries), then
+    # write a temp file and rename it over the old one, so a failure never
+    # leaves a truncated cache behind.
+    now = time.time()
+    with _neg_lock:
+        snapshot = {
+            h: {p: t for p, t in paths.items() if t > now}
+            for h, paths in NEG_CACHE.items()
+        }
+    tmp = f"{NEG_CACHE_FILE}.tmp"
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({h: paths for h, paths in snapshot.items() if paths}, f)
+        os.replace(tmp, NEG_CACHE_FILE)
+    except Exception as e:
+        LOG.warning(f"Could not write {NEG_CACHE_FILE}: {e}")
+
+def fetch_page_final(url: str) -> Tuple[str, Optional[str]]:
+    """Fetch url and return (final url after redirects, html)."""
+    if crawl_mod and hasattr(crawl_mod, "fetch_final"):
+        try:
+            return crawl_mod.fetch_final(url)  # type: ignore
+        except Exception:
+            pass
+    return safe_fetch_final(url)
+
+def _done(result: Any) -> Future:
+    fut: Future = Future()
+    fut.set_result(result)
+    return fut
+
+def scan_page(url: str, html: Optional[str]) -> Optional[Tuple[List[str], bool]]:
+    """fetch_pages hook: (emails, has_form) for a fetched page, None if it failed."""
+    return extract_contacts_from_html(html, url) if html else None
+
+def fetch_pages(
+    urls: List[str],
+    budget_s: float = ROW_FETCH_BUDGET_S,
+    cache: Optional[Dict[str, Optional[str]]] = None,
+    then: Optional[Callable[[str, Optional[str]], Any]] = None,
+) -> Iterator[Tuple[str, Any]]:
+    """
+    Fetch urls concurrently and yield (url, html) in the original order.
+    Urls whose norm_url() is a key of cache are served from it, not fetched.
+    With then, yields (url, then(url, html)) instead; the worker that fetched a
+    page also runs then on it, so parsing overlaps the rest of the window's
+    network wait rather than happening serially on the caller's thread.
+
+    Keeps FETCH_WORKERS requests in flight (a sliding window, so one slow server
+    doesn't hold back a whole batch) and gives up once budget_s has elapsed.
+    Stop iterating to abandon whatever is still outstanding.
+    """
+    if not urls:
+        return
+    deadline = time.monotonic() + budget_s
+
+    def work(u: str, html: Optional[str] = None, fetch: bool = True) -> Any:
+        if fetch:
+            html = fetch_page_noting_dead(u)
+        return then(u, html) if then else html
+
+    def submit(u: str) -> Future:
+        key = norm_url(u) if cache else None
+        if key is not None and key in cache:
+            return IO_POOL.submit(work, u, cache[key], False) if then else _done(cache[key])
+        if is_dead(u):
+            return _done(work(u, None, False))
+        return IO_POOL.submit(work, u)
+
+    pending = iter(urls)
+    window = deque((u, submit(u)) for u in islice(pending, FETCH_WORKERS))
+    try:
+        while window:
+            url, fut = window.popleft()
+            try:
+                result = fut.result(timeout=max(0.0, deadline - time.monotonic()))
+            except FuturesTimeout:
+                LOG.info(f"Fetch budget ({budget_s:.0f}s) used up; skipping {len(window) + 1} pages")
+                return
+            except Exception:
+                result = None
+            nxt = next(pending, None)
+            if nxt is not None:
+                window.append((nxt, submit(nxt)))
+            yield url, result
+    finally:
+        # drop what hasn't started; don't wait on stragglers, whose sockets
+        # time out on their own
+        for _, fut in window:
+            fut.cancel()
+
+@functools.lru_cache(maxsize=256)
+def site_host(site: str) -> str:
+    """Bare host of a site URL or domain: no port, no leading www."""
+    host = url_host(site if "://" in site else f"https://{site}").split(":")[0]
+    return host[4:] if host.startswith("www.") else host
+
+def email_on_site(email: str, site: Optional[str]) -> bool:
+    """True if the address is on the company's own registrable domain (acme.co.uk for shop.acme.co.uk)."""
+    if not site or extract_mod is None:
+        return False
+    # rank_emails calls this per address per sort; the site's host is parsed once
+    host = site_host(site)
+    dom = email.rsplit("@", 1)[-1].lower()
+    # private PSL suffixes count, so acme.myshopify.com doesn't claim @myshopify.com
+    reg = extract_mod._registrable_domain_host
+    return bool(host) and reg(dom, private=True) == reg(host, private=True)
+
+
+def rank_emails(emails: List[str], site: Optional[str]) -> List[str]:
+    # deterministic best-first order: on the company domain, generic inbox, shortest
+    return sorted(
+        emails,
+        key=lambda e: (
+            0 if email_on_site(e, site) else 1,
+            0 if e.split("@", 1)[0].lower() in GENERIC_LOCALS else 1,
+            len(e),
+            e,
+        ),
+    )
+
+def found_company_email(emails: List[str], site: Optional[str]) -> bool:
+    # with PREFER_COMPANY_DOMAIN, one on-domain address is all we need from a site
+    return PREFER_COMPANY_DOMAIN and any(email_on_site(e, site) for e in emails)
+
 # ===== Official site resolution
 def find_official_site(company: str, domain_hint: str = "") -> Optional[str]:
-    # Prefer explicit domain
-    dom = (domain_hint or "").strip()
-    if dom and "." in dom and " " not in dom:
-        return dom if dom.startswith("http") else f"https://{dom}"
+    # Prefer an explicit, well-formed domain: no search needed
+    site = hint_url(domain_hint)
+    if site and TRUST_DOMAIN_HINT:
+        return site
 
     # Use project search if available
     if search_mod and hasattr(search_mod, "find_official_site"):
@@ -212,38 +518,17 @@ def find_official_site(company: str, domain_hint: str = "") -> Optional[str]:
     return None
 
 # ===== Google CSE fallback (never guess)
+# search.py owns the process's one CSE client (pacing, retrying session,
+# optionally persistent cache); with no key/cx configured it returns [].
+
 def cse_search(query: str, num: int = 4) -> List[str]:
-    key = os.getenv("GOOGLE_CSE_KEY", "").strip()
-    cx = os.getenv("GOOGLE_CSE_CX", "").strip()
-    if not key or not cx:
+    if search_mod is None:
         return []
-    params = {
-        "key": key,
-        "cx": cx,
-        "q": query,
-        "num": max(1, min(num, 10)),
-        "safe": "off",
-    }
     try:
-        r = requests.get("https://www.googleapis.com/customsearch/v1", params=params, timeout=15)
-        r.raise_for_status()
-        data = r.json()
-        items = data.get("items", []) or []
-        urls = []
-        for it in items:
-            link = it.get("link")
-            if not link:
-                continue
-            host = urlparse(link).netloc
-            if is_bad_host(host):
-                continue
-            urls.append(link)
-        # polite delay for quotas
-        delay_ms = int(os.getenv("GOOGLE_CSE_QPS_DELAY_MS", "600") or "600")
-        time.sleep(max(0, delay_ms) / 1000.0)
-        return urls
+        urls = search_mod.google_search(query, num)
     except Exception:
         return []
+    return [u for u in urls if not is_bad_host(url_host(u))]
 
 def google_contact_hunt(company: str, location: str, domain_for_site: Optional[str]=None, limit: int = 4) -> Tuple[List[str], Optional[str], Optional[str]]:
     """
@@ -252,7 +537,7 @@ def google_contact_hunt(company: str, location: str, domain_for_site: Optional[s
     queries = [f"\"{company}\" {location} email contact"]
     # tighten to site if we know it
     if domain_for_site:
-        host = urlparse(domain_for_site if domain_for_site.startswith("http") else f"https://{domain_for_site}").netloc
+        host = url_host(domain_for_site if domain_for_site.startswith("http") else f"https://{domain_for_site}")
         if host:
             queries.append(f"site:{host} contact email")
 
@@ -261,48 +546,90 @@ def google_contact_hunt(company: str, location: str, domain_for_site: Optional[s
     best_form: Optional[str] = None
     source_url: Optional[str] = None
 
-    for q in queries:
-        urls = cse_search(q, num=limit)
+    # Issue the (at most two) CSE queries concurrently over the pooled session
+    # rather than paying their round trips + pacing delay back to back. Results
+    # are still consumed in query order, so the early return below is unchanged.
+    results = list(IO_POOL.map(lambda q: cse_search(q, num=limit), queries))
+
+    for urls in results:
         if not urls:
             continue
         LOG.info(f"Google candidates: {urls}")
-        for u in urls:
-            if u in tried:
+        pending = [u for u in dict.fromkeys(urls) if u not in tried]
+        tried.update(pending)
+        for u, scanned in fetch_pages(pending, then=scan_page):
+            if not scanned:
                 continue
-            tried.add(u)
-            html = fetch_page(u)
-            if not html:
-                continue
-            emails, has_form = extract_contacts_from_html(html, u)
+            emails, has_form = scanned
             if emails and not best_emails:
                 best_emails = emails
                 source_url = u
             if has_form and not best_form:
                 best_form = u
-            if best_emails and best_form:
+            if best_emails and (best_form or found_company_email(best_emails, domain_for_site)):
                 return best_emails, best_form, source_url
 
     return best_emails, best_form, source_url
 
 # ===== Row processing
-def set_cell(ws: gspread.Worksheet, row: int, col: Optional[int], value: Optional[str]) -> None:
-    if col and value is not None:
+class RowWriter:
+    """
+    Queues cell writes and sends them as one values.batchUpdate on flush().
+    set() may be called from any worker thread; flush() runs on one thread.
+    """
+
+    def __init__(self, ws: gspread.Worksheet) -> None:
+        self.ws = ws
+        self.pending: List[dict] = []
+        self._lock = threading.Lock()
+
+    def set(self, row: int, col: Optional[int], value: Optional[str]) -> None:
+        if col and value is not None:
+            cell = {"range": gspread.utils.rowcol_to_a1(row, col), "values": [[value]]}
+            with self._lock:
+                self.pending.append(cell)
+
+    def flush(self) -> None:
+        with self._lock:
+            batch, self.pending = self.pending, []
+        if not batch:
+            return
         try:
-            ws.update_cell(row, col, value)
+            self.ws.batch_update(batch, value_input_option="USER_ENTERED")
         except Exception as e:
-            LOG.warning(f"Cell update failed (row {row}, col {col}): {e}")
+            LOG.warning(f"Batch update failed ({len(batch)} cells): {e}")
+
+class TokenBucket:
+    """
+    Spaces calls at least 60/rate_per_min seconds apart, sleeping only for
+    whatever part of that interval hasn't already elapsed since the last call.
+    """
+
+    def __init__(self, rate_per_min: float) -> None:
+        self.interval = 60.0 / rate_per_min
+        self.next = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            wait = self.next - now
+            self.next = max(now, self.next) + self.interval
+        if wait > 0:
+            time.sleep(wait)
 
-def process_one(ws: gspread.Worksheet, row_idx: int, H: Dict[str, int], default_location: str) -> None:
-    def val(col_name: str) -> str:
-        c = H.get(col_name)
+# Sheets allows 60 write requests/min per user; keep some headroom.
+SHEET_WRITES = TokenBucket(50)
+
+def process_one(row_vals: List[str], row_idx: int, cols: Cols, default_location: str, writer: RowWriter, checked_at: str) -> None:
+    def val(c: Optional[int]) -> str:
         if not c:
             return ""
-        row_vals = ws.row_values(row_idx)
         return row_vals[c - 1].strip() if len(row_vals) >= c else ""
 
-    company = val("Company")
-    domain_hint = val("Domain")
-    website_existing = val("Website")
+    company = val(cols.company)
+    domain_hint = val(cols.domain)
+    website_existing = val(cols.website)
 
     if not company and not domain_hint:
         return
@@ -311,7 +638,7 @@ def process_one(ws: gspread.Worksheet, row_idx: int, H: Dict[str, int], default_
     homepage = website_existing or find_official_site(company, domain_hint) or ""
     if homepage:
         LOG.info(f"[INFO] [{company}] Google resolved: {homepage}")
-        set_cell(ws, row_idx, H.get("Website"), homepage)
+        writer.set(row_idx, cols.website, homepage)
 
     # 2) Site-first crawl
     emails_found: List[str] = []
@@ -319,20 +646,21 @@ def process_one(ws: gspread.Worksheet, row_idx: int, H: Dict[str, int], default_
     source_url: Optional[str] = None
 
     candidates: List[str] = []
+    home_cache: Dict[str, Optional[str]] = {}
     if homepage:
-        candidates = discover_contact_pages(homepage)
+        home_html, candidates = discover_contact_pages(homepage)
+        home_cache[norm_url(candidates[0])] = home_html
 
-    for url in candidates[:40]:
-        html = fetch_page(url)
-        if not html:
+    for url, scanned in fetch_pages(candidates[:40], cache=home_cache, then=scan_page):
+        if not scanned:
             continue
-        emails, has_form = extract_contacts_from_html(html, url)
+        emails, has_form = scanned
         if emails and not emails_found:
             emails_found = emails
             source_url = url
         if has_form and not form_url:
             form_url = url
-        if emails_found and form_url:
+        if emails_found and (form_url or found_company_email(emails_found, homepage)):
             break
 
     # 3) Google fallback ONLY if nothing found on site
@@ -346,33 +674,35 @@ def process_one(ws: gspread.Worksheet, row_idx: int, H: Dict[str, int], default_
 
     # 4) Update sheet (never guess)
     if emails_found:
-        set_cell(ws, row_idx, H.get("ContactEmail"), ", ".join(emails_found))
+        writer.set(row_idx, cols.email, ", ".join(rank_emails(emails_found, homepage or domain_hint)))
     if form_url:
-        set_cell(ws, row_idx, H.get("ContactFormURL"), form_url)
+        writer.set(row_idx, cols.form, form_url)
     if source_url:
-        set_cell(ws, row_idx, H.get("SourceURL"), source_url)
+        writer.set(row_idx, cols.source, source_url)
 
     status_msg = "Found" if (emails_found or form_url) else "No public contact"
-    set_cell(ws, row_idx, H.get("Status"), status_msg)
-    set_cell(ws, row_idx, H.get("LastChecked"), now_iso())
-
-def find_start_row(ws: gspread.Worksheet, H: Dict[str, int]) -> int:
-    status_col = H.get("Status")
-    email_col = H.get("ContactEmail")
-    form_col = H.get("ContactFormURL")
-    for r in range(2, (ws.row_count or 2000) + 1):
-        vals = ws.row_values(r)
-        if not any(v.strip() for v in vals):
-            continue
-        status_ok = True
-        if status_col:
-            v = vals[status_col - 1].strip() if len(vals) >= status_col else ""
-            status_ok = (v == "") or (v.lower() not in {"done", "skip"})
-        email_blank = (not email_col) or (len(vals) < email_col) or (vals[email_col - 1].strip() == "")
-        form_blank = (not form_col) or (len(vals) < form_col) or (vals[form_col - 1].strip() == "")
-        if status_ok and email_blank and form_blank:
-            return r
-    return 2
+    writer.set(row_idx, cols.status, status_msg)
+    writer.set(row_idx, cols.checked, checked_at)
+
+def process_row(row_vals: List[str], row_idx: int, cols: Cols, default_location: str, writer: RowWriter, checked_at: str) -> None:
+    company = row_vals[(cols.company or 1) - 1].strip()
+    LOG.info(f"== {company} ==")
+    try:
+        process_one(row_vals, row_idx, cols, default_location, writer, checked_at)
+    except Exception as e:
+        LOG.info(f"[{company}] Site crawl error: {e}")
+        writer.set(row_idx, cols.checked, checked_at)
+        writer.set(row_idx, cols.status, f"Error: {type(e).__name__}")
+
+def col_letter(c: int) -> str:
+    return gspread.utils.rowcol_to_a1(1, c)[:-1]
+
+def find_start_row(ws: gspread.Worksheet, cols: Cols) -> int:
+    """
+    First row sheet.needs_processing accepts (row 2 if none). Reads only the
+    company, status, email and form columns, not the whole sheet.
+    """
+    return first_unprocessed_row(ws, cols.company or 1, cols.status, cols.email, cols.form) or 2
 
 # ===== Runner
 def run() -> None:
@@ -385,39 +715,75 @@ def run() -> None:
         LOG.error("SHEET_ID is missing.")
         sys.exit(1)
 
+    install_dns_cache()
+    load_neg_cache()
     ws = open_sheet(sheet_id, sheet_tab)
-    H = header_map(ws)
-    start_row = find_start_row(ws, H)
+    # Narrow reads instead of the whole grid: the header, the columns
+    # find_start_row needs, then pages of rows from the start row down, only
+    # until max_rows of them need work.
+    header = ws.row_values(1)
+    cols = resolve_cols(header_map(header))
+    start_row = find_start_row(ws, cols)
     LOG.info(f"Starting at first unprocessed row: {start_row}")
-
-    processed = 0
-    row = start_row
-    last_row = ws.row_count or (start_row + max_rows + 10)
-
-    while processed < max_rows and row <= last_row:
-        vals = ws.row_values(row)
-        if not any(v.strip() for v in vals):
-            row += 1
-            continue
-        company = vals[H.get("Company", 1) - 1] if len(vals) >= H.get("Company", 1) else ""
-        if not company.strip():
-            row += 1
-            continue
-
-        LOG.info(f"== {company.strip()} ==")
-        t0 = time.time()
-        try:
-            process_one(ws, row, H, default_location)
-        except Exception as e:
-            LOG.info(f"Site crawl error: {e}")
-            set_cell(ws, row, H.get("LastChecked"), now_iso())
-            set_cell(ws, row, H.get("Status"), f"Error: {type(e).__name__}")
-        finally:
-            processed += 1
-            elapsed = time.time() - t0
-            if elapsed < 1.0:
-                time.sleep(1.0 - elapsed)
-        row += 1
+    rows = iter_rows(ws, start_row, page=ROW_PAGE, last_col=col_letter(max(len(header), 1)))
+
+    # Pick the rows to process in one pass: rows past the start row that were
+    # already finished (e.g. by an earlier, interrupted run) are skipped too.
+    def cell(vals: List[str], c: Optional[int]) -> str:
+        return vals[c - 1].strip() if c and len(vals) >= c else ""
+
+    company_col = cols.company or 1
+    work = list(islice(
+        (
+            (row, vals)
+            for row, vals in rows
+            if needs_processing(cell(vals, company_col), cell(vals, cols.status), cell(vals, cols.email), cell(vals, cols.form))
+        ),
+        max_rows,
+    ))
+
+    # Rows that already have a Website (or a trusted Domain) go straight to the
+    # crawl and never touch CSE, so they get the wide pool. Rows that need a
+    # site lookup are CSE-bound and run on a narrower one to respect its quota.
+    def has_site(vals: List[str]) -> bool:
+        if cell(vals, cols.website):
+            return True
+        return TRUST_DOMAIN_HINT and hint_url(cell(vals, cols.domain)) is not None
+
+    with_site = [(row, vals) for row, vals in work if has_site(vals)]
+    without_site = [(row, vals) for row, vals in work if not has_site(vals)]
+    LOG.info(f"{len(with_site)} rows with a known site, {len(without_site)} needing a site search")
+
+    # one LastChecked stamp for the whole batch
+    batch_ts = now_iso()
+
+    # Rows run concurrently; workers only queue cells, and this thread is the
+    # single writer, sending one batchUpdate per FLUSH_EVERY_ROWS finished rows
+    # (paced by SHEET_WRITES to stay inside the Sheets quota) and a final one
+    # for whatever is left, even if the run is interrupted.
+    writer = RowWriter(ws)
+    unflushed = 0
+    try:
+        with ThreadPoolExecutor(max_workers=ROW_WORKERS) as crawl_ex, \
+                ThreadPoolExecutor(max_workers=SEARCH_ROW_WORKERS) as search_ex:
+            futures = [
+                ex.submit(process_row, vals, row, cols, default_location, writer, batch_ts)
+                for ex, batch in ((search_ex, without_site), (crawl_ex, with_site))
+                for row, vals in batch
+            ]
+            for fut in as_completed(futures):
+                fut.result()
+                unflushed += 1
+                if unflushed < FLUSH_EVERY_ROWS:
+                    continue
+                SHEET_WRITES.acquire()
+                writer.flush()
+                unflushed = 0
+    finally:
+        if writer.pending:
+            SHEET_WRITES.acquire()
+            writer.flush()
+    save_neg_cache()
 
     LOG.info("Done.")
 
@@ -1,42 +1,70 @@
 # src/search.py
 from __future__ import annotations
+import atexit
+import functools
+import shelve
+import threading
 import time
 import re
-from typing import List, Iterable
-from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Iterable, Tuple
 
-import requests
 import tldextract
 
+# orjson (optional, C) decodes CSE responses several times faster than json
+try:
+    from orjson import loads as _json_loads  # type: ignore
+except ImportError:
+    from json import loads as _json_loads
+
 from .config import (
     GOOGLE_CSE_KEY,
     GOOGLE_CSE_CX,
     GOOGLE_CSE_QPS_DELAY_MS,
-    GOOGLE_CSE_MAX_RETRIES,
     MAX_GOOGLE_CANDIDATES,
     DEFAULT_LOCATION,
     BAD_HOSTS,
     CONTACT_PATHS,
-    HEADERS,
     PREFER_COMPANY_DOMAIN,
+    TRUST_DOMAIN_HINT,
+    hint_url,
+    CSE_CACHE_FILE,
 )
+from .http_utils import SESSION
 
 # ---- helpers ----------------------------------------------------------
 
+_CONTACT_URL_HINT = re.compile(r"contact|kontakt", re.I)
 _DEF_EXCLUDE_EXT = re.compile(r"\.(pdf|docx?|xlsx?|pptx?|zip|rar)(?:$|\?)", re.I)
 
-def _is_bad_host(url: str) -> bool:
-    try:
-        host = urlparse(url).netloc.lower()
-    except Exception:
-        return True
-    host = host.lstrip("www.")
-    return any(host == bad or host.endswith("." + bad) for bad in BAD_HOSTS)
+# BAD_HOSTS (and their subdomains) matched straight off the raw URL's authority
+# part in one compiled pass: no urlparse and no per-host Python loop.
+_BAD_HOSTS_RE = re.compile(
+    r"^(?:[a-z][a-z0-9+.-]*:)?//(?:[^/?#@]*@)?(?:[^/?#]*\.)?"
+    r"(?:" + "|".join(re.escape(h) for h in BAD_HOSTS) + r")"
+    r"\.?(?::\d+)?(?:[/?#]|$)",
+    re.I,
+)
+
+# Every CSE-result rejection rule (bad host, non-HTML document extension) as a
+# single alternation: one scan per result link instead of one per rule.
+_REJECT_LINK_RE = re.compile(
+    "(?:" + _BAD_HOSTS_RE.pattern + ")|(?:" + _DEF_EXCLUDE_EXT.pattern + ")",
+    re.I,
+)
+
+# One offline extractor (bundled suffix-list snapshot, no fetch of the live
+# list, no disk cache) instead of the tldextract.extract() module default.
+_TLD = tldextract.TLDExtract(cache_dir=None, suffix_list_urls=(), fallback_to_snapshot=True)
 
-def _same_registered_domain(a: str, b: str) -> bool:
-    ea = tldextract.extract(a)
-    eb = tldextract.extract(b)
-    return (ea.domain, ea.suffix) == (eb.domain, eb.suffix) and ea.suffix != ""
+@functools.lru_cache(maxsize=4096)
+def _extract(u: str) -> Tuple[str, str, str]:
+    """(subdomain, domain, suffix), memoized: CSE results repeat the same URLs and hosts."""
+    e = _TLD(u)
+    return (e.subdomain, e.domain, e.suffix)
+
+def _registered_domain(u: str) -> Tuple[str, str]:
+    return _extract(u)[1:]
 
 def _normalize_url(u: str) -> str:
     u = u.strip()
@@ -46,8 +74,80 @@ def _normalize_url(u: str) -> str:
         return "https://" + u
     return u
 
-def _google_search(query: str, num: int = 5) -> List[str]:
+# CSE results per (num, query). Only successful responses are stored, so a
+# throttled/failed query is retried next time. Mirrored to CSE_CACHE_FILE if set.
+_cse_cache: dict[str, List[str]] = {}
+_cse_lock = threading.Lock()
+_cse_shelf: shelve.Shelf | None = None
+
+def _cse_cache_get(key: str) -> List[str] | None:
+    global _cse_shelf
+    with _cse_lock:
+        hit = _cse_cache.get(key)
+        if hit is None and CSE_CACHE_FILE:
+            if _cse_shelf is None:
+                _cse_shelf = shelve.open(CSE_CACHE_FILE)
+                atexit.register(_cse_shelf.close)
+            hit = _cse_shelf.get(key)
+            if hit is not None:
+                _cse_cache[key] = hit
+        return list(hit) if hit is not None else None
+
+def _cse_cache_put(key: str, urls: List[str]) -> None:
+    with _cse_lock:
+        _cse_cache[key] = list(urls)
+        if _cse_shelf is not None:
+            _cse_shelf[key] = list(urls)
+
+# CSE pacing shared by all threads: each call books a start slot
+# GOOGLE_CSE_QPS_DELAY_MS after the previous one, so concurrent queries overlap
+# their round trips without exceeding the QPS budget. Cache hits don't book.
+_CSE_INFLIGHT = 3
+# one pool for every google_contact_hunt call, rather than threads per call
+_CSE_POOL = ThreadPoolExecutor(max_workers=_CSE_INFLIGHT, thread_name_prefix="cse")
+_cse_next = 0.0
+_cse_pace_lock = threading.Lock()
+
+def _cse_pace() -> None:
+    global _cse_next
+    with _cse_pace_lock:
+        now = time.monotonic()
+        slot = max(now, _cse_next)
+        _cse_next = slot + GOOGLE_CSE_QPS_DELAY_MS / 1000.0
+    if slot > now:
+        time.sleep(slot - now)
+
+# A 429 that outlasts the adapter's retries means CSE is throttling the whole
+# key, not one request: push every thread's next slot back by a shared backoff
+# that doubles per 429 (capped) and halves per success.
+_CSE_BACKOFF_MAX_S = 8.0
+_cse_backoff = 0.0
+
+def _cse_throttled() -> None:
+    global _cse_next, _cse_backoff
+    with _cse_pace_lock:
+        _cse_backoff = min(_CSE_BACKOFF_MAX_S, max(0.5, _cse_backoff * 2))
+        _cse_next = max(_cse_next, time.monotonic() + _cse_backoff)
+
+def _cse_ok() -> None:
+    global _cse_backoff
+    if _cse_backoff:
+        with _cse_pace_lock:
+            _cse_backoff = _cse_backoff / 2 if _cse_backoff > 0.5 else 0.0
+
+# Without credentials every CSE call would still book a pacing slot and get a
+# 400 back; decided once here, not per query.
+_CSE_ENABLED = bool(GOOGLE_CSE_KEY and GOOGLE_CSE_CX)
+
+def google_search(query: str, num: int = 5) -> List[str]:
     """Call Google CSE with backoff, return list of urls."""
+    if not _CSE_ENABLED:
+        return []
+    key = f"{num}|{query}"
+    cached = _cse_cache_get(key)
+    if cached is not None:
+        return cached
+
     params = {
         "key": GOOGLE_CSE_KEY,
         "cx":  GOOGLE_CSE_CX,
@@ -55,64 +155,72 @@ def _google_search(query: str, num: int = 5) -> List[str]:
         "num": max(1, min(num, 10)),
         "safe": "off",
     }
-    backoff = 0.5
-    for attempt in range(GOOGLE_CSE_MAX_RETRIES):
-        r = requests.get(
+    # 429/5xx retries with backoff (and Retry-After) are handled by the
+    # googleapis.com adapter mounted on SESSION in http_utils.
+    _cse_pace()
+    try:
+        r = SESSION.get(
             "https://www.googleapis.com/customsearch/v1",
             params=params,
-            headers=HEADERS,
             timeout=20,
         )
-        if r.status_code == 200:
-            data = r.json()
-            items = data.get("items") or []
-            urls = []
-            for it in items:
-                link = it.get("link", "")
-                if not link:
-                    continue
-                link = _normalize_url(link)
-                if _DEF_EXCLUDE_EXT.search(link):
-                    continue
-                if _is_bad_host(link):
-                    continue
-                urls.append(link)
-            # gentle throttle
-            time.sleep(GOOGLE_CSE_QPS_DELAY_MS / 1000.0)
-            return urls
-        elif r.status_code == 429:
-            time.sleep(backoff)
-            backoff = min(8.0, backoff * 2)
+    except Exception:
+        return []
+    if r.status_code == 429:
+        _cse_throttled()
+    if r.status_code != 200:
+        return []
+    _cse_ok()
+    data = _json_loads(r.content)
+    items = data.get("items") or []
+    urls = []
+    for it in items:
+        link = it.get("link", "")
+        if not link:
+            continue
+        link = _normalize_url(link)
+        if _REJECT_LINK_RE.search(link):
             continue
-        else:
-            # small pause but keep going
-            time.sleep(0.25)
-    return []
+        urls.append(link)
+    _cse_cache_put(key, urls)
+    return urls
 
 def _uniq_keep_order(seq: Iterable[str]) -> List[str]:
-    seen = set()
-    out: List[str] = []
-    for s in seq:
-        if s not in seen:
-            seen.add(s)
-            out.append(s)
-    return out
+    # dicts keep insertion order: one C-level pass, first occurrence wins
+    return list(dict.fromkeys(seq))
+
+# Terms for site-restricted queries, in query order; built once at import
+_SITE_QUERY_TERMS = tuple(CONTACT_PATHS) + ("privacy-policy", "contact-us", "email", "mailto", "contact email")
+
+@functools.lru_cache(maxsize=1024)
+def _site_queries(site_root: str) -> Tuple[str, ...]:
+    """The site: queries for a registered domain; rows sharing a site reuse them."""
+    return tuple(f"site:{site_root} {t}" for t in _SITE_QUERY_TERMS)
 
 # ---- public API -------------------------------------------------------
 
+# Resolved sites per (company, domain_hint). Only hits are stored: a miss may
+# just be CSE throttling or an error, and is retried on the next call.
+_site_cache: dict[tuple[str, str | None], str] = {}
+
 def find_official_site(company: str, domain_hint: str | None = None) -> str | None:
     """
     Try to resolve the company's official site:
       1) If domain_hint is provided, prefer it.
       2) Try queries with DEFAULT_LOCATION to localize.
       3) Return the first non-bad host result.
+    Found sites are cached per (company, domain_hint), so repeated companies
+    in a batch resolve once; None is never cached.
     """
-    if domain_hint:
-        try:
-            # trust the hint; normalize
-            return _normalize_url(domain_hint)
-        except Exception:
-            pass
+    key = (company, domain_hint)
+    hit = _site_cache.get(key)
+    if hit is not None:
+        return hit
+
+    site = hint_url(domain_hint)
+    if site and TRUST_DOMAIN_HINT:
+        # a well-formed domain is the cheapest, most reliable answer: no CSE
+        return site
 
     qlist = [
         f"{company} official site {DEFAULT_LOCATION}",
@@ -121,11 +229,13 @@ def find_official_site(company: str, domain_hint: str | None = None) -> str | No
         f"{company} {DEFAULT_LOCATION}",
     ]
 
+    # google_search already drops bad hosts (before caching), so the first
+    # result of the first query that has any is the answer
     for q in qlist:
-        urls = _google_search(q, 5)
-        for u in urls:
-            if not _is_bad_host(u):
-                return u
+        urls = google_search(q, 5)
+        if urls:
+            _site_cache[key] = urls[0]
+            return urls[0]
     return None
 
 def google_contact_hunt(
@@ -138,21 +248,20 @@ def google_contact_hunt(
     Build a small set of likely 'contact-ish' URLs, favoring the official domain if known.
     We return raw URLs; upstream code should fetch and extract emails/forms.
     """
+    if not _CSE_ENABLED:
+        return []
     loc = location or DEFAULT_LOCATION
     queries: List[str] = []
 
+    # the site's registered domain, extracted once and reused below
+    base_reg = _registered_domain(domain_for_site) if domain_for_site else ("", "")
+
     # If we know the domain, stick to it.
     if domain_for_site:
-        host = urlparse(_normalize_url(domain_for_site)).netloc
-        root = tldextract.extract(host)
-        site_root = ".".join([p for p in [root.domain, root.suffix] if p])
+        site_root = ".".join(p for p in base_reg if p)
         if site_root:
             # site-restricted queries
-            for path in CONTACT_PATHS + ["privacy-policy", "contact-us"]:
-                queries.append(f"site:{site_root} {path}")
-            queries.append(f"site:{site_root} email")
-            queries.append(f"site:{site_root} mailto")
-            queries.append(f"site:{site_root} contact email")
+            queries.extend(_site_queries(site_root))
     else:
         # No domain known: search with company+location + contact-y words
         base = f"{company} {loc}"
@@ -165,28 +274,43 @@ def google_contact_hunt(
             f"{base} about",
         ])
 
-    # De-dup queries, run them, collect URLs
+    # De-dup queries and run up to _CSE_INFLIGHT at once (paced by _cse_pace),
+    # consuming results in query order. Stop early once there are enough URLs
+    # and one of them is already a contact page on the company's domain;
+    # queries not yet started are cancelled.
+    # Each URL's registered domain is extracted once, as it arrives, and reused
+    # by both the early-exit check and the preferred-domain partition.
     urls: List[str] = []
-    for q in _uniq_keep_order(queries):
-        urls.extend(_google_search(q, 5))
-        if len(urls) >= (limit * 2):
-            break
+    regs: dict[str, Tuple[str, str]] = {}
+    onsite_contact = False
+    futures = [_CSE_POOL.submit(google_search, q, 5) for q in _uniq_keep_order(queries)]
+    try:
+        for fut in futures:
+            for u in fut.result():
+                urls.append(u)
+                if base_reg[1] and u not in regs:
+                    regs[u] = _registered_domain(u)
+                    if regs[u] == base_reg and _CONTACT_URL_HINT.search(u):
+                        onsite_contact = True
+            if len(urls) >= (limit * 2):
+                break
+            if onsite_contact and len(urls) >= limit:
+                break
+    finally:
+        for fut in futures:
+            fut.cancel()
 
-    # Candidate post-filter:
-    # - drop bad hosts
+    # Candidate post-filter (bad hosts are already gone: google_search drops
+    # them before caching):
     # - if we know the official domain, prefer same registered domain
-    urls = [u for u in urls if not _is_bad_host(u)]
     urls = _uniq_keep_order(urls)
 
     if domain_for_site and PREFER_COMPANY_DOMAIN:
         preferred, other = [], []
         for u in urls:
-            try:
-                if _same_registered_domain(u, domain_for_site):
-                    preferred.append(u)
-                else:
-                    other.append(u)
-            except Exception:
+            if base_reg[1] and regs.get(u) == base_reg:
+                preferred.append(u)
+            else:
                 other.append(u)
         urls = preferred + other
 
@@ -1,4 +1,5 @@
-import base64, json, datetime, binascii
+import base64, json, binascii, functools, time
+from collections import namedtuple
 import gspread
 from google.oauth2.service_account import Credentials
 
@@ -30,36 +31,182 @@ def _load_sa_info(value: str):
     except (binascii.Error, json.JSONDecodeError) as e:
         raise RuntimeError("GOOGLE_SA_JSON_B64 is neither valid JSON nor valid base64 JSON") from e
 
+# One authorized client per service account and one handle per worksheet for
+# the life of the process: repeat opens skip the token handshake and Drive lookup.
+@functools.lru_cache(maxsize=4)
 def _client(sa_json_value):
     info = _load_sa_info(sa_json_value)
     creds = Credentials.from_service_account_info(info, scopes=SCOPES)
     return gspread.authorize(creds)
 
+@functools.lru_cache(maxsize=8)
 def open_sheet(sa_json_value, sheet_id, worksheet_name=None):
     gc = _client(sa_json_value)
     sh = gc.open_by_key(sheet_id)
     return sh.worksheet(worksheet_name) if worksheet_name else sh.sheet1
 
+def reset_sheet_cache():
+    """Forget cached clients and worksheet handles (e.g. after rotating credentials)."""
+    open_sheet.cache_clear()
+    _client.cache_clear()
+
+# Columns the search pipeline reads, by HEADERS position (A, B, C, G)
+ROW_COLUMNS = {"company": "A", "domain": "B", "website": "C", "status": "G"}
+Row = namedtuple("Row", list(ROW_COLUMNS))
+
 def read_rows(ws):
-    return ws.get_all_records()
+    """
+    One Row(company, domain, website, status) per data row from row 2 down.
+    Fetches just those columns in one values.batchGet rather than every cell
+    via get_all_records.
+    """
+    columns = ws.batch_get([f"{c}2:{c}" for c in ROW_COLUMNS.values()])
+    n = max(map(len, columns), default=0)
 
-def ensure_headers(ws):
-    current = ws.row_values(1)
-    if current != HEADERS:
-        ws.update("A1", [HEADERS])
+    def cell(col, i):
+        return col[i][0] if i < len(col) and col[i] else ""
 
-def write_result(ws, row_idx_1_based, result: dict):
+    return [Row(*(cell(col, i) for col in columns)) for i in range(n)]
+
+def needs_processing(company, status, email, form):
     """
-    Writes columns C..I (Website..Notes) and updates LastChecked (H).
+    The one definition of an unprocessed row, from stripped cell values: it has
+    a company, no contact yet, and a Status other than done/skip. Rows that
+    ended in "Error: ..." or "No public contact" are picked up again.
+    """
+    return bool(company) and status.lower() not in {"done", "skip"} and not email and not form
+
+def _col(c):
+    return gspread.utils.rowcol_to_a1(1, c)[:-1]
+
+def read_result_status_column(ws, company_col=1, status_col=7, email_col=4, form_col=5):
+    """
+    One (company, status, email, form) tuple of stripped values per data row,
+    from row 2 down. Reads only those columns (1-based; defaults follow the
+    HEADERS layout, None means absent) in a single values.batchGet, not the
+    whole sheet.
+    """
+    wanted = [c for c in (company_col, status_col, email_col, form_col) if c]
+    data = ws.batch_get([f"{_col(c)}2:{_col(c)}" for c in wanted])
+    column = {c: [r[0] if r else "" for r in vr] for c, vr in zip(wanted, data)}
+
+    def cell(c, i):
+        vals = column.get(c) if c else None
+        return vals[i].strip() if vals and i < len(vals) else ""
+
+    return [
+        (cell(company_col, i), cell(status_col, i), cell(email_col, i), cell(form_col, i))
+        for i in range(len(column.get(company_col, ())))
+    ]
+
+def first_unprocessed_row(ws, company_col=1, status_col=7, email_col=4, form_col=5):
+    """1-based index of the first row needs_processing accepts, or None."""
+    rows = read_result_status_column(ws, company_col, status_col, email_col, form_col)
+    for i, cells in enumerate(rows, start=2):
+        if needs_processing(*cells):
+            return i
+    return None
+
+def iter_rows(ws, start_row=2, page=1000, last_col=None):
+    """
+    Yields (row_idx_1_based, values) from start_row down, reading page rows per
+    values.get instead of the whole sheet. values is the row's cell list, as
+    ws.get returns it (trailing blanks dropped); zip it with the row-1 headers
+    for a record. last_col defaults to the header row's width. Blank rows
+    inside a page come back as []; paging runs to the grid's last row.
+    """
+    if last_col is None:
+        last_col = gspread.utils.rowcol_to_a1(1, max(len(ws.row_values(1)), 1))[:-1]
+    cur = start_row
+    while cur <= ws.row_count:
+        vals = ws.get(f"A{cur}:{last_col}{cur + page - 1}")
+        yield from enumerate(vals, start=cur)
+        # values.get drops trailing blank rows, so a short page only means the
+        # page ended blank, not that the sheet did: keep going to row_count
+        cur += page
+
+_HEADER_RANGE = f"A1:{gspread.utils.rowcol_to_a1(1, len(HEADERS))}"
+
+def ensure_headers(ws, batcher=None):
+    """
+    Reads just the header cells (A1:M1) and rewrites them if they differ.
+    With a ResultBatcher the write is queued into its next flush instead of
+    costing a request of its own.
     """
-    values = [
+    got = ws.get(_HEADER_RANGE)
+    if (got[0] if got else []) != HEADERS:
+        if batcher is not None:
+            batcher.add_raw(_HEADER_RANGE, [HEADERS])
+        else:
+            ws.update(_HEADER_RANGE, [HEADERS])
+
+ISO_FMT = "%Y-%m-%dT%H:%M:%SZ"
+
+def now_iso() -> str:
+    # UTC, second precision. time.strftime on a struct_time is a plain C call;
+    # no datetime object needed.
+    return time.strftime(ISO_FMT, time.gmtime())
+
+def _result_values(result: dict, checked_at: str):
+    return [
         result.get("Website", ""),
         result.get("ContactEmail", ""),
         result.get("ContactFormURL", ""),
         result.get("SourceURL", ""),
         result.get("Status", ""),
-        datetime.datetime.utcnow().isoformat(),
+        checked_at,
         result.get("Notes", "")
     ]
+
+def write_result(ws, row_idx_1_based, result: dict):
+    """
+    Writes columns C..I (Website..Notes) and updates LastChecked (H).
+    One request per call; for many rows use ResultBatcher.
+    """
+    values = _result_values(result, now_iso())
     # IMPORTANT: this must be a real f-string like below (no asterisks around the variable name)
     ws.update(range_name=f"C{row_idx_1_based}:I{row_idx_1_based}", values=[values])
+
+def batch_write_results(ws, pending, extra=()):
+    """
+    Same cells as write_result, for many rows in one values.batchUpdate call.
+    pending is a list of (row_idx_1_based, result) pairs; it is not modified.
+    extra is (a1_range, values) pairs to write in the same call, first.
+    """
+    if not pending and not extra:
+        return
+    checked_at = now_iso()
+    data = [
+        {"range": gspread.utils.absolute_range_name(ws.title, rng), "values": values}
+        for rng, values in extra
+    ] + [
+        {"range": gspread.utils.absolute_range_name(ws.title, f"C{i}:I{i}"), "values": [_result_values(result, checked_at)]}
+        for i, result in pending
+    ]
+    ws.spreadsheet.values_batch_update({"valueInputOption": "RAW", "data": data})
+
+class ResultBatcher:
+    """
+    Buffers results and writes them with batch_write_results: one
+    values.batchUpdate per flush_every rows instead of one update per row.
+    Call flush() at the end of a run for whatever is left.
+    """
+    def __init__(self, ws, flush_every=100):
+        self.ws = ws
+        self.flush_every = max(1, flush_every)
+        self._buf = []
+        self._raw = []
+
+    def add(self, row_idx_1_based, result: dict):
+        self._buf.append((row_idx_1_based, result))
+        if len(self._buf) >= self.flush_every:
+            self.flush()
+
+    def add_raw(self, a1_range, values):
+        """Queue a plain range write (e.g. headers) for the next flush."""
+        self._raw.append((a1_range, values))
+
+    def flush(self):
+        pending, self._buf = self._buf, []
+        extra, self._raw = self._raw, []
+        batch_write_results(self.ws, pending, extra)
@@ -0,0 +1,36 @@
+import re
+
+from src import sheet
+
+
+class FakeWorksheet:
+    """Just enough of gspread.Worksheet for iter_rows: values.get semantics included."""
+
+    def __init__(self, grid, row_count=None):
+        self.grid = grid  # row 1 first; [] is a blank row
+        self.row_count = row_count or len(grid)
+
+    def row_values(self, r):
+        return list(self.grid[r - 1]) if r <= len(self.grid) else []
+
+    def get(self, rng):
+        start, end = map(int, re.match(r"[A-Z]+(\d+):[A-Z]+(\d+)", rng).groups())
+        rows = [list(r) for r in self.grid[start - 1:end]]
+        while rows and not rows[-1]:  # trailing blank rows are dropped
+            rows.pop()
+        return rows
+
+
+def test_iter_rows_pages_past_a_blank_row_at_a_page_boundary():
+    grid = [["Company"]] + [[f"c{i}"] for i in range(2, 11)]
+    grid[5] = []  # row 6 blank: the first page (rows 2-6) comes back short
+    ws = FakeWorksheet(grid)
+
+    got = list(sheet.iter_rows(ws, start_row=2, page=5))
+
+    assert [i for i, vals in got if vals] == [2, 3, 4, 5, 7, 8, 9, 10]
+
+
+def test_iter_rows_stops_at_row_count():
+    ws = FakeWorksheet([["Company"], ["a"], ["b"]], row_count=3)
+    assert list(sheet.iter_rows(ws, start_row=2, page=1, last_col="A")) == [(2, ["a"]), (3, ["b"])]